@@ -2,38 +2,66 @@
 
 from __future__ import annotations
 
+import asyncio
+import atexit
+import hashlib
+import heapq
+import http.client
+import itertools
 import json
 import os
+import pickle
+import queue
 import re
 import subprocess
+import threading
 import tkinter as tk
 import urllib.error
+import urllib.parse
 import urllib.request
 import webbrowser
+from collections import Counter, OrderedDict
 from dataclasses import dataclass, field
 from pathlib import Path
+from tkinter import font as tkfont
 from tkinter import messagebox
+from typing import Any, BinaryIO, Callable
 
+try:
+    import ijson  # type: ignore
+except ImportError:
+    ijson = None
 
-@dataclass
+try:
+    import orjson  # type: ignore
+
+    _loads: Callable[[str | bytes], Any] = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+_JSON_ERRORS: tuple[type[Exception], ...] = (json.JSONDecodeError,) if ijson is None else (json.JSONDecodeError, ijson.JSONError)
+
+
+@dataclass(slots=True)
 class Action:
     type: str
     value: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class Step:
     instruction: str
     target: dict[str, float] | None = None
     actions: list[Action] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     title: str
     description: str
     steps: list[Step]
     source: str = "library"
+    token_set: frozenset[str] = field(default=frozenset(), repr=False)
 
 
 DEFAULT_TASK_LIBRARY: dict[str, dict] = {
@@ -75,10 +103,30 @@ KEYWORDS: dict[str, tuple[str, ...]] = {
     "vpn": ("vpn", "remote", "tunnel", "secure access"),
 }
 
+MAX_LLM_CANDIDATES = 8
+PLAN_CACHE_SIZE = 64
+SUGGESTION_DEBOUNCE_MS = 120
+# Bump when Task/Step/Action change shape so stale task caches are rebuilt.
+TASK_CACHE_VERSION = 1
+
+_TOKEN_RE = re.compile(r"\w+")
+_KEYWORD_TOKEN_RE = re.compile(r"[\w-]+")
+
 
 class FrontendAgent:
     """Executes optional actions attached to a step."""
 
+    # pyautogui is optional and slow to import; resolve it once per process.
+    _pyautogui = None
+    _pyautogui_tried = False
+
+    def __init__(self) -> None:
+        self._handlers: dict[str, Callable[[str], str]] = {
+            "open_url": self._do_open_url,
+            "open_app": self._do_open_app,
+            "hotkey": self._do_hotkey,
+        }
+
     def execute_step(self, step: Step) -> list[str]:
         if not step.actions:
             return ["No automatic actions on this step."]
@@ -89,49 +137,162 @@ class FrontendAgent:
         return logs
 
     def _execute_action(self, action: Action) -> str:
-        if action.type == "open_url":
-            webbrowser.open(action.value)
-            return f"Opened URL: {action.value}"
-
-        if action.type == "open_app":
-            if action.value:
-                subprocess.Popen(action.value, shell=True)
-                return f"Launched app command: {action.value}"
-            return "Skipped open_app: missing command value."
-
-        if action.type == "hotkey":
+        handler = self._handlers.get(action.type)
+        if handler is None:
+            return f"Unknown action type: {action.type}"
+        return handler(action.value)
+
+    def _do_open_url(self, value: str) -> str:
+        webbrowser.open(value)
+        return f"Opened URL: {value}"
+
+    def _do_open_app(self, value: str) -> str:
+        if value:
+            subprocess.Popen(value, shell=True)
+            return f"Launched app command: {value}"
+        return "Skipped open_app: missing command value."
+
+    def _do_hotkey(self, value: str) -> str:
+        if not FrontendAgent._pyautogui_tried:
             try:
                 import pyautogui  # type: ignore
 
-                keys = [k.strip() for k in action.value.split("+") if k.strip()]
-                if keys:
-                    pyautogui.hotkey(*keys)
-                    return f"Sent hotkey: {action.value}"
-                return "Skipped hotkey: no keys provided."
+                FrontendAgent._pyautogui = pyautogui
             except Exception:
-                return "Hotkey action requires optional dependency pyautogui."
-
-        return f"Unknown action type: {action.type}"
-
-
-def _build_task(raw: dict, source: str = "library") -> Task:
+                pass
+            FrontendAgent._pyautogui_tried = True
+
+        if FrontendAgent._pyautogui is None:
+            return "Hotkey action requires optional dependency pyautogui."
+        try:
+            keys = [k.strip() for k in value.split("+") if k.strip()]
+            if keys:
+                FrontendAgent._pyautogui.hotkey(*keys)
+                return f"Sent hotkey: {value}"
+            return "Skipped hotkey: no keys provided."
+        except Exception:
+            return "Hotkey action requires optional dependency pyautogui."
+
+
+def _build_task(raw: dict, source: str = "library", key: str = "") -> Task:
     steps = []
     for item in raw["steps"]:
         actions = [Action(type=a["type"], value=a.get("value", "")) for a in item.get("actions", [])]
         steps.append(Step(instruction=item["instruction"], target=item.get("target"), actions=actions))
-    return Task(title=raw["title"], description=raw["description"], steps=steps, source=source)
+    token_set = frozenset(_TOKEN_RE.findall(f"{key} {raw['title']} {raw['description']}".lower()))
+    return Task(title=raw["title"], description=raw["description"], steps=steps, source=source, token_set=token_set)
+
+
+# Built-in tasks are built once; Task objects are not mutated after construction.
+_DEFAULT_TASKS: dict[str, Task] = {
+    key: _build_task(value, source="library", key=key) for key, value in DEFAULT_TASK_LIBRARY.items()
+}
+
+
+def _task_cache_dir() -> Path:
+    if os.name == "nt":
+        base = os.getenv("LOCALAPPDATA") or str(Path.home() / "AppData" / "Local")
+    else:
+        base = os.getenv("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "tech-support-overlay"
+
+
+def _task_cache_path(file_path: Path) -> Path:
+    # Only the per-user cache directory is ever unpickled; nothing next to tasks.json is.
+    digest = hashlib.sha256(str(file_path.resolve()).encode("utf-8")).hexdigest()
+    return _task_cache_dir() / f"tasks-{digest}.pkl"
+
+
+def _load_task_file(file_path: Path) -> dict[str, Task]:
+    """Builds tasks from a tasks.json file, reusing a pickle cache in the per-user cache directory."""
+    stat = file_path.stat()
+    cache_key = (TASK_CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+    cache_path = _task_cache_path(file_path)
+
+    try:
+        with cache_path.open("rb") as fh:
+            stored_key, cached = pickle.load(fh)
+        if stored_key == cache_key:
+            return cached
+    except Exception:
+        pass  # missing, stale or unreadable cache: rebuild below
+
+    with file_path.open("r", encoding="utf-8") as fh:
+        incoming = json.load(fh)
+    tasks: dict[str, Task] = {}
+    if isinstance(incoming, dict):
+        tasks = {key: _build_task(value, source="library", key=key) for key, value in incoming.items()}
+
+    try:
+        cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        with cache_path.open("wb") as fh:
+            pickle.dump((cache_key, tasks), fh, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass
+    return tasks
 
 
 def load_task_library(tasks_file: str = "tasks.json") -> dict[str, Task]:
-    raw = dict(DEFAULT_TASK_LIBRARY)
+    tasks = dict(_DEFAULT_TASKS)
     file_path = Path(tasks_file)
     if file_path.exists():
-        with file_path.open("r", encoding="utf-8") as fh:
-            incoming = json.load(fh)
-        if isinstance(incoming, dict):
-            raw.update(incoming)
+        tasks.update(_load_task_file(file_path))
+
+    return tasks
+
+
+@dataclass(slots=True)
+class TokenIndex:
+    """Inverted index from token to the positions of the tasks that contain it.
+
+    Scoring a query only touches tasks that share a token with it, so it stays cheap
+    for task packs with thousands of entries.
+    """
+
+    keys: tuple[str, ...]
+    postings: dict[str, tuple[int, ...]]
+    phrases: tuple[tuple[str, int], ...] = ()
+
+    def score(self, query_tokens: set[str], text: str = "") -> Counter[int]:
+        scores = Counter(pos for token in query_tokens for pos in self.postings.get(token, ()))
+        for phrase, pos in self.phrases:
+            if phrase in text:
+                scores[pos] += 1
+        return scores
+
+    def top(self, scores: Counter[int], k: int) -> list[str]:
+        # Ties keep library order, matching a stable sort over the task dict.
+        best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [self.keys[pos] for pos, _ in best]
+
 
-    return {key: _build_task(value, source="library") for key, value in raw.items()}
+def _build_token_index(token_sets: dict[str, frozenset[str]], phrases: dict[str, tuple[str, ...]] | None = None) -> TokenIndex:
+    keys = tuple(token_sets)
+    postings: dict[str, list[int]] = {}
+    for pos, key in enumerate(keys):
+        for token in token_sets[key]:
+            postings.setdefault(token, []).append(pos)
+
+    phrase_postings = tuple((phrase, pos) for pos, key in enumerate(keys) for phrase in (phrases or {}).get(key, ()))
+    return TokenIndex(keys=keys, postings={token: tuple(p) for token, p in postings.items()}, phrases=phrase_postings)
+
+
+def build_task_index(tasks: dict[str, Task]) -> TokenIndex:
+    """Index for ``suggest_tasks``; rebuild it whenever the task library changes."""
+    return _build_token_index({key: task.token_set for key, task in tasks.items()})
+
+
+def _build_keyword_index(keyword_map: dict[str, tuple[str, ...]]) -> TokenIndex:
+    """Single-token keywords go in the inverted index; phrases are kept for substring checks."""
+    words: dict[str, frozenset[str]] = {}
+    phrases: dict[str, tuple[str, ...]] = {}
+    for task_key, task_words in keyword_map.items():
+        words[task_key] = frozenset(word for word in task_words if _KEYWORD_TOKEN_RE.fullmatch(word))
+        phrases[task_key] = tuple(word for word in task_words if word not in words[task_key])
+    return _build_token_index(words, phrases)
+
+
+_KEYWORD_INDEX = _build_keyword_index(KEYWORDS)
 
 
 def infer_task_key(request: str, keywords: dict[str, tuple[str, ...]] | None = None) -> str | None:
@@ -140,60 +301,180 @@ def infer_task_key(request: str, keywords: dict[str, tuple[str, ...]] | None = N
     if not text:
         return None
 
-    best_key = None
-    best_score = 0
-    for task_key, words in keyword_map.items():
-        score = sum(1 for word in words if word in text)
-        if score > best_score:
-            best_key = task_key
-            best_score = score
+    index = _KEYWORD_INDEX if keyword_map is KEYWORDS else _build_keyword_index(keyword_map)
+    # Whole hyphenated words ("wi-fi") plus their parts ("vpn-client" -> "vpn").
+    query_tokens = set(_KEYWORD_TOKEN_RE.findall(text)) | set(_TOKEN_RE.findall(text))
+    best = index.top(index.score(query_tokens, text), 1)
+    return best[0] if best else None
 
-    return best_key if best_score else None
 
+def suggest_tasks(request: str, tasks: dict[str, Task], k: int = 6, index: TokenIndex | None = None) -> list[str]:
+    """Returns up to ``k`` task keys, best match first.
 
-def suggest_tasks(request: str, tasks: dict[str, Task]) -> list[str]:
+    ``index`` is an optional ``build_task_index(tasks)`` for large libraries; it is
+    ignored if its keys no longer match ``tasks``.
+    """
     text = request.lower().strip()
     if not text:
-        return list(tasks.keys())
+        return list(itertools.islice(tasks, k))
 
-    ranked: list[tuple[int, str]] = []
-    for key, task in tasks.items():
-        bag = f"{key} {task.title} {task.description}".lower()
-        score = sum(1 for token in text.split() if token in bag)
-        ranked.append((score, key))
+    query_tokens = set(_TOKEN_RE.findall(text))
+    if index is not None and index.keys == tuple(tasks):
+        top = index.top(index.score(query_tokens), k)
+    else:
+        ranked: list[tuple[int, str]] = []
+        for key, task in tasks.items():
+            score = len(query_tokens & task.token_set)
+            if score > 0:
+                ranked.append((score, key))
+        top = [key for _, key in heapq.nlargest(k, ranked, key=lambda pair: pair[0])]
 
-    ranked.sort(key=lambda pair: pair[0], reverse=True)
-    return [k for score, k in ranked if score > 0] or list(tasks.keys())
+    return top or list(itertools.islice(tasks, k))
 
 
 def _extract_json_blob(content: str) -> dict | None:
     content = content.strip()
     if content.startswith("```"):
-        content = re.sub(r"^```(?:json)?", "", content).strip()
-        content = re.sub(r"```$", "", content).strip()
+        content = content.removeprefix("```").removeprefix("json")
+        content = content.removesuffix("```").strip()
 
     try:
-        return json.loads(content)
-    except json.JSONDecodeError:
+        return _loads(content)
+    except json.JSONDecodeError:  # orjson.JSONDecodeError subclasses it
         return None
 
 
-def generate_task_from_llm(user_request: str) -> Task | None:
-    """Uses an OpenAI-compatible endpoint if env vars are configured.
+def _read_message_content(resp: BinaryIO) -> str:
+    """Pulls choices[0].message.content out of a chat completion response body."""
+    if ijson is not None:
+        return next(ijson.items(resp, "choices.item.message.content"), "")
 
-    Required environment:
-      OVERLAY_LLM_URL, OVERLAY_LLM_MODEL
-    Optional:
-      OVERLAY_LLM_API_KEY
-    """
+    data = _loads(resp.read())
+    return (
+        data.get("choices", [{}])[0]
+        .get("message", {})
+        .get("content", "")
+    )
 
-    endpoint = os.getenv("OVERLAY_LLM_URL", "").strip()
-    model = os.getenv("OVERLAY_LLM_MODEL", "").strip()
-    api_key = os.getenv("OVERLAY_LLM_API_KEY", "").strip()
 
-    if not endpoint or not model:
+# Idle keep-alive connections per (scheme, host:port), reused across planner requests.
+_idle_connections: dict[tuple[str, str], list[http.client.HTTPConnection]] = {}
+_idle_lock = threading.Lock()
+
+
+def _acquire_connection(scheme: str, netloc: str) -> tuple[http.client.HTTPConnection, bool]:
+    with _idle_lock:
+        idle = _idle_connections.get((scheme, netloc))
+        if idle:
+            return idle.pop(), True
+
+    if scheme == "https":
+        return http.client.HTTPSConnection(netloc, timeout=20), False
+    return http.client.HTTPConnection(netloc, timeout=20), False
+
+
+def _release_connection(scheme: str, netloc: str, conn: http.client.HTTPConnection) -> None:
+    with _idle_lock:
+        _idle_connections.setdefault((scheme, netloc), []).append(conn)
+
+
+@atexit.register
+def _close_idle_connections() -> None:
+    with _idle_lock:
+        for conns in _idle_connections.values():
+            for conn in conns:
+                conn.close()
+        _idle_connections.clear()
+
+
+def _proxy_applies(url: urllib.parse.SplitResult) -> bool:
+    return url.scheme in urllib.request.getproxies() and not urllib.request.proxy_bypass(url.hostname or "")
+
+
+def _urlopen_chat_completion(endpoint: str, body: bytes, headers: dict[str, str]) -> str:
+    req = urllib.request.Request(endpoint, data=body, headers=headers, method="POST")
+    with urllib.request.urlopen(req, timeout=20) as resp:
+        return _read_message_content(resp)
+
+
+def _post_chat_completion(endpoint: str, payload: dict, api_key: str) -> str:
+    url = urllib.parse.urlsplit(endpoint)
+    body = json.dumps(payload).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if api_key:
+        headers["Authorization"] = f"Bearer {api_key}"
+
+    # The keep-alive pool only speaks direct HTTP(S); proxied endpoints and other
+    # schemes keep going through urlopen, which honours HTTP(S)_PROXY / NO_PROXY.
+    if url.scheme not in ("http", "https") or _proxy_applies(url):
+        return _urlopen_chat_completion(endpoint, body, headers)
+
+    path = (url.path or "/") + (f"?{url.query}" if url.query else "")
+    while True:
+        conn, reused = _acquire_connection(url.scheme, url.netloc)
+        try:
+            conn.request("POST", path, body=body, headers=headers)
+            resp = conn.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionError):
+            conn.close()
+            if reused:
+                # The server dropped an idle keep-alive connection; retry on a fresh one.
+                continue
+            raise
+        except BaseException:
+            conn.close()
+            raise
+        break
+
+    try:
+        # urlopen would not replay a POST body across a redirect either, so 3xx is an error here too.
+        if resp.status >= 300:
+            raise urllib.error.HTTPError(endpoint, resp.status, resp.reason, resp.headers, None)
+        content = _read_message_content(resp)
+        resp.read()  # drain whatever the parser left so the connection can be reused
+    except BaseException:
+        conn.close()
+        raise
+
+    if resp.will_close:
+        conn.close()
+    else:
+        _release_connection(url.scheme, url.netloc, conn)
+    return content
+
+
+def _candidate_count() -> int:
+    try:
+        count = int(os.getenv("OVERLAY_LLM_CANDIDATES", "1"))
+    except ValueError:
+        return 1
+    return max(1, min(count, MAX_LLM_CANDIDATES))
+
+
+def _task_from_content(content: str) -> Task | None:
+    blob = _extract_json_blob(content)
+    if not isinstance(blob, dict) or "steps" not in blob:
+        return None
+
+    try:
+        return _build_task(blob, source="llm")
+    except (KeyError, TypeError):
         return None
 
+
+async def _one_call(endpoint: str, payload: dict, api_key: str) -> str | None:
+    """Returns the message content if it holds a usable plan."""
+    try:
+        content = await asyncio.to_thread(_post_chat_completion, endpoint, payload, api_key)
+    except (OSError, http.client.HTTPException, *_JSON_ERRORS):
+        return None
+
+    return content if _task_from_content(content) else None
+
+
+async def _acollect_plan(endpoint: str, model: str, api_key: str, user_request: str) -> str | None:
+    """Requests candidate plans concurrently and returns the first usable one."""
+
     schema_hint = {
         "title": "Task title",
         "description": "Short explanation",
@@ -221,30 +502,67 @@ def generate_task_from_llm(user_request: str) -> Task | None:
         "temperature": 0.2,
     }
 
-    req = urllib.request.Request(endpoint, data=json.dumps(payload).encode("utf-8"), method="POST")
-    req.add_header("Content-Type", "application/json")
-    if api_key:
-        req.add_header("Authorization", f"Bearer {api_key}")
+    payloads = [payload] * _candidate_count()
+    results = await asyncio.gather(*[_one_call(endpoint, p, api_key) for p in payloads], return_exceptions=True)
+    return next((content for content in results if isinstance(content, str)), None)
 
-    try:
-        with urllib.request.urlopen(req, timeout=20) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-    except (urllib.error.URLError, TimeoutError, json.JSONDecodeError):
-        return None
 
-    content = (
-        data.get("choices", [{}])[0]
-        .get("message", {})
-        .get("content", "")
-    )
-    blob = _extract_json_blob(content)
-    if not blob or "steps" not in blob:
+# Successful plan contents keyed on (endpoint, model, sha256(api key), request), least recently used first.
+_plan_cache: OrderedDict[tuple[str, str, str, str], str] = OrderedDict()
+_plan_cache_lock = threading.Lock()
+
+
+async def _agenerate_task_from_llm(user_request: str) -> Task | None:
+    """Async planner request; repeated requests are served from the plan cache."""
+
+    endpoint = os.getenv("OVERLAY_LLM_URL", "").strip()
+    model = os.getenv("OVERLAY_LLM_MODEL", "").strip()
+    api_key = os.getenv("OVERLAY_LLM_API_KEY", "").strip()
+
+    if not endpoint or not model:
         return None
 
+    cache_key = (endpoint, model, hashlib.sha256(api_key.encode("utf-8")).hexdigest(), user_request)
+    with _plan_cache_lock:
+        content = _plan_cache.get(cache_key)
+        if content is not None:
+            _plan_cache.move_to_end(cache_key)
+
+    if content is None:
+        content = await _acollect_plan(endpoint, model, api_key, user_request)
+        if content is None:
+            return None
+        with _plan_cache_lock:
+            _plan_cache[cache_key] = content
+            _plan_cache.move_to_end(cache_key)
+            if len(_plan_cache) > PLAN_CACHE_SIZE:
+                _plan_cache.popitem(last=False)
+
+    return _task_from_content(content)
+
+
+def generate_task_from_llm(user_request: str) -> Task | None:
+    """Uses an OpenAI-compatible endpoint if env vars are configured.
+
+    Required environment:
+      OVERLAY_LLM_URL, OVERLAY_LLM_MODEL
+    Optional:
+      OVERLAY_LLM_API_KEY
+      OVERLAY_LLM_CANDIDATES (plans sampled concurrently, 1..8; first valid one wins)
+    """
+
+    return asyncio.run(_agenerate_task_from_llm(user_request))
+
+
+def _generate_task_into(results: queue.Queue[Task | None], user_request: str) -> None:
+    """Worker-thread body for the prompt; always posts a result so the UI poller cannot hang."""
+    task = None
     try:
-        return _build_task(blob, source="llm")
-    except (KeyError, TypeError):
-        return None
+        task = generate_task_from_llm(user_request)
+    except Exception:
+        task = None
+    finally:
+        results.put(task)
 
 
 class OverlayUI:
@@ -266,48 +584,102 @@ class OverlayUI:
         self.canvas = tk.Canvas(self.root, bg="#0E1220", highlightthickness=0)
         self.canvas.pack(fill=tk.BOTH, expand=True)
 
-        self.next_btn = tk.Button(self.root, text="Next ▶", command=self.next_step, font=("Segoe UI", 12, "bold"))
-        self.prev_btn = tk.Button(self.root, text="◀ Previous", command=self.prev_step, font=("Segoe UI", 12, "bold"))
-        self.close_btn = tk.Button(self.root, text="✕ Close", command=self.root.destroy, font=("Segoe UI", 12, "bold"))
-        self.agent_btn = tk.Button(self.root, text="Do it for me", command=self.run_agent_for_step, font=("Segoe UI", 12, "bold"))
+        self.font_title = tkfont.Font(root=self.root, family="Segoe UI", size=18, weight="bold")
+        self.font_body = tkfont.Font(root=self.root, family="Segoe UI", size=14)
+        self.font_button = tkfont.Font(root=self.root, family="Segoe UI", size=12, weight="bold")
+        self.font_detail = tkfont.Font(root=self.root, family="Segoe UI", size=11)
+        self.font_detail_bold = tkfont.Font(root=self.root, family="Segoe UI", size=11, weight="bold")
+        self.font_small = tkfont.Font(root=self.root, family="Segoe UI", size=10)
+
+        self.next_btn = tk.Button(self.root, text="Next ▶", command=self.next_step, font=self.font_button)
+        self.prev_btn = tk.Button(self.root, text="◀ Previous", command=self.prev_step, font=self.font_button)
+        self.close_btn = tk.Button(self.root, text="✕ Close", command=self.root.destroy, font=self.font_button)
+        self.agent_btn = tk.Button(self.root, text="Do it for me", command=self.run_agent_for_step, font=self.font_button)
 
-        self.root.bind("<Escape>", lambda _: self.root.destroy())
-        self.root.bind("<Right>", lambda _: self.next_step())
-        self.root.bind("<Left>", lambda _: self.prev_step())
+        self.root.bind("<Escape>", self._on_escape)
+        self.root.bind("<Right>", self._on_right)
+        self.root.bind("<Left>", self._on_left)
+
+        # Canvas items are created once and repositioned/re-texted on each render.
+        self._target_items = self._create_target_items()
+        self._panel_items = self._create_panel_items()
+        self._create_controls()
 
         self.render()
 
+    def _on_escape(self, _event: tk.Event | None = None) -> None:
+        self.root.destroy()
+
+    def _on_right(self, _event: tk.Event | None = None) -> None:
+        self.next_step()
+
+    def _on_left(self, _event: tk.Event | None = None) -> None:
+        self.prev_step()
+
     def run_agent_for_step(self) -> None:
         logs = self.agent.execute_step(self.task.steps[self.step_index])
         self.status_message = " | ".join(logs)
         self.render()
 
-    def draw_instruction_panel(self) -> None:
+    def _create_target_items(self) -> dict[str, int]:
+        items = {
+            side: self.canvas.create_rectangle(0, 0, 0, 0, fill="#0B0F1A", outline="", stipple="gray50", tags=("target",))
+            for side in ("top", "bottom", "left", "right")
+        }
+        items["highlight"] = self.canvas.create_rectangle(0, 0, 0, 0, outline="#FFD166", width=5, tags=("target",))
+        items["outline"] = self.canvas.create_rectangle(0, 0, 0, 0, outline="#FF8A00", width=2, dash=(8, 6), tags=("target",))
+        items["label"] = self.canvas.create_text(0, 0, text="Go here", fill="#FFD166", font=self.font_button, tags=("target",))
+        return items
+
+    def _create_panel_items(self) -> dict[str, int]:
         panel_x, panel_y = 36, 36
         panel_w, panel_h = 760, 300
         self.canvas.create_rectangle(panel_x, panel_y, panel_x + panel_w, panel_y + panel_h, fill="#1A2238", outline="#6EC1FF", width=2)
 
-        step = self.task.steps[self.step_index]
-        self.canvas.create_text(panel_x + 20, panel_y + 24, text=self.task.title, fill="#EAF3FF", anchor="nw", font=("Segoe UI", 18, "bold"))
+        self.canvas.create_text(panel_x + 20, panel_y + 24, text=self.task.title, fill="#EAF3FF", anchor="nw", font=self.font_title)
         self.canvas.create_text(
             panel_x + 20,
             panel_y + 62,
             text=f"{self.task.description}  • source: {self.task.source}",
             fill="#BED3EE",
             anchor="nw",
-            font=("Segoe UI", 11),
+            font=self.font_detail,
             width=panel_w - 40,
         )
 
-        step_label = f"Step {self.step_index + 1}/{len(self.task.steps)}"
-        self.canvas.create_text(panel_x + 20, panel_y + 120, text=step_label, fill="#9ACBFF", anchor="nw", font=("Segoe UI", 11, "bold"))
-        self.canvas.create_text(panel_x + 20, panel_y + 148, text=step.instruction, fill="#FFFFFF", anchor="nw", font=("Segoe UI", 14), width=panel_w - 40)
+        return {
+            "step_label": self.canvas.create_text(panel_x + 20, panel_y + 120, fill="#9ACBFF", anchor="nw", font=self.font_detail_bold),
+            "instruction": self.canvas.create_text(panel_x + 20, panel_y + 148, fill="#FFFFFF", anchor="nw", font=self.font_body, width=panel_w - 40),
+            "status": self.canvas.create_text(panel_x + 20, panel_y + 240, fill="#8EF5B6", anchor="nw", font=self.font_small, width=panel_w - 40),
+        }
+
+    def _create_controls(self) -> None:
+        self.canvas.create_window(self.width - 120, 45, window=self.close_btn)
+        self.canvas.create_window(self.width - 120, self.height - 45, window=self.next_btn)
+        self.canvas.create_window(self.width - 260, self.height - 45, window=self.prev_btn)
+        self.canvas.create_window(self.width - 430, self.height - 45, window=self.agent_btn)
+
+        self.canvas.create_text(
+            self.width // 2,
+            self.height - 24,
+            text="ESC: close • ←/→: previous/next • Do it for me: run step action",
+            fill="#9BB1CC",
+            font=self.font_small,
+        )
+
+    def draw_instruction_panel(self) -> None:
+        step = self.task.steps[self.step_index]
+        self.canvas.itemconfigure(self._panel_items["step_label"], text=f"Step {self.step_index + 1}/{len(self.task.steps)}")
+        self.canvas.itemconfigure(self._panel_items["instruction"], text=step.instruction)
 
         if self.status_message:
-            self.canvas.create_text(panel_x + 20, panel_y + 240, text=f"Agent: {self.status_message}", fill="#8EF5B6", anchor="nw", font=("Segoe UI", 10), width=panel_w - 40)
+            self.canvas.itemconfigure(self._panel_items["status"], text=f"Agent: {self.status_message}", state=tk.NORMAL)
+        else:
+            self.canvas.itemconfigure(self._panel_items["status"], text="", state=tk.HIDDEN)
 
     def draw_target(self, target: dict[str, float] | None) -> None:
         if not target:
+            self.canvas.itemconfigure("target", state=tk.HIDDEN)
             return
 
         x = int(target["x"] * self.width)
@@ -315,25 +687,21 @@ class OverlayUI:
         w = int(target["w"] * self.width)
         h = int(target["h"] * self.height)
 
-        self.canvas.create_rectangle(0, 0, self.width, y, fill="#0B0F1A", outline="", stipple="gray50")
-        self.canvas.create_rectangle(0, y + h, self.width, self.height, fill="#0B0F1A", outline="", stipple="gray50")
-        self.canvas.create_rectangle(0, y, x, y + h, fill="#0B0F1A", outline="", stipple="gray50")
-        self.canvas.create_rectangle(x + w, y, self.width, y + h, fill="#0B0F1A", outline="", stipple="gray50")
+        items = self._target_items
+        self.canvas.coords(items["top"], 0, 0, self.width, y)
+        self.canvas.coords(items["bottom"], 0, y + h, self.width, self.height)
+        self.canvas.coords(items["left"], 0, y, x, y + h)
+        self.canvas.coords(items["right"], x + w, y, self.width, y + h)
 
-        self.canvas.create_rectangle(x, y, x + w, y + h, outline="#FFD166", width=5)
-        self.canvas.create_rectangle(x - 8, y - 8, x + w + 8, y + h + 8, outline="#FF8A00", width=2, dash=(8, 6))
-        self.canvas.create_text(x + w // 2, max(24, y - 28), text="Go here", fill="#FFD166", font=("Segoe UI", 12, "bold"))
+        self.canvas.coords(items["highlight"], x, y, x + w, y + h)
+        self.canvas.coords(items["outline"], x - 8, y - 8, x + w + 8, y + h + 8)
+        self.canvas.coords(items["label"], x + w // 2, max(24, y - 28))
+        self.canvas.itemconfigure("target", state=tk.NORMAL)
 
     def render(self) -> None:
-        self.canvas.delete("all")
         self.draw_target(self.task.steps[self.step_index].target)
         self.draw_instruction_panel()
 
-        self.canvas.create_window(self.width - 120, 45, window=self.close_btn)
-        self.canvas.create_window(self.width - 120, self.height - 45, window=self.next_btn)
-        self.canvas.create_window(self.width - 260, self.height - 45, window=self.prev_btn)
-        self.canvas.create_window(self.width - 430, self.height - 45, window=self.agent_btn)
-
         self.prev_btn.configure(state=(tk.DISABLED if self.step_index == 0 else tk.NORMAL))
 
         if self.step_index >= len(self.task.steps) - 1:
@@ -341,14 +709,6 @@ class OverlayUI:
         else:
             self.next_btn.configure(text="Next ▶", command=self.next_step)
 
-        self.canvas.create_text(
-            self.width // 2,
-            self.height - 24,
-            text="ESC: close • ←/→: previous/next • Do it for me: run step action",
-            fill="#9BB1CC",
-            font=("Segoe UI", 10),
-        )
-
     def next_step(self) -> None:
         if self.step_index < len(self.task.steps) - 1:
             self.step_index += 1
@@ -370,6 +730,7 @@ def launch_overlay(task: Task) -> None:
 
 def start_prompt() -> None:
     tasks = load_task_library()
+    task_index = build_task_index(tasks)
 
     prompt = tk.Tk()
     prompt.title("Tech Support AI Overlay")
@@ -410,11 +771,30 @@ def start_prompt() -> None:
     status = tk.Label(prompt, text="", bg="#1C243A", fg="#FFB4B4", font=("Segoe UI", 10, "bold"), wraplength=630)
     status.pack(pady=(2, 0))
 
+    refresh_job: str | None = None
+
     def refresh_suggestions() -> None:
+        nonlocal refresh_job
+        refresh_job = None
         listbox.delete(0, tk.END)
-        for key in suggest_tasks(entry.get(), tasks)[:6]:
+        for key in suggest_tasks(entry.get(), tasks, k=6, index=task_index):
             listbox.insert(tk.END, f"{tasks[key].title}  [{key}]")
 
+    def schedule_refresh(_event: tk.Event | None = None) -> None:
+        # Collapse a burst of keystrokes into a single refresh.
+        nonlocal refresh_job
+        if refresh_job is not None:
+            prompt.after_cancel(refresh_job)
+        refresh_job = prompt.after(SUGGESTION_DEBOUNCE_MS, refresh_suggestions)
+
+    def close_prompt() -> None:
+        # Cancel a pending debounced refresh so its Tcl timer does not fire after destroy().
+        nonlocal refresh_job
+        if refresh_job is not None:
+            prompt.after_cancel(refresh_job)
+            refresh_job = None
+        prompt.destroy()
+
     def selected_task_key() -> str | None:
         selection = listbox.curselection()
         if selection:
@@ -422,33 +802,55 @@ def start_prompt() -> None:
             return text.split("[")[-1].rstrip("]")
         return infer_task_key(entry.get())
 
+    def start_from_library() -> None:
+        task_key = selected_task_key()
+        if not task_key or task_key not in tasks:
+            status.config(text="Task not recognized yet. Add tasks in tasks.json, pick a suggestion, or enable LLM.")
+            return
+
+        close_prompt()
+        launch_overlay(tasks[task_key])
+
+    def poll_llm(results: queue.Queue[Task | None]) -> None:
+        try:
+            llm_task = results.get_nowait()
+        except queue.Empty:
+            prompt.after(100, poll_llm, results)
+            return
+
+        go_button.configure(state=tk.NORMAL)
+        if llm_task:
+            close_prompt()
+            launch_overlay(llm_task)
+            return
+        status.config(text="LLM unavailable or returned invalid JSON. Falling back to local library.")
+        start_from_library()
+
     def on_start() -> None:
+        if str(go_button["state"]) == tk.DISABLED:
+            return
+
         query = entry.get().strip()
         if not query:
             status.config(text="Please enter a request.")
             return
 
         if llm_var.get():
-            llm_task = generate_task_from_llm(query)
-            if llm_task:
-                prompt.destroy()
-                launch_overlay(llm_task)
-                return
-            status.config(text="LLM unavailable or returned invalid JSON. Falling back to local library.")
-
-        task_key = selected_task_key()
-        if not task_key or task_key not in tasks:
-            status.config(text="Task not recognized yet. Add tasks in tasks.json, pick a suggestion, or enable LLM.")
+            # Keep the Tk event loop responsive while the planner request is in flight.
+            results: queue.Queue[Task | None] = queue.Queue(maxsize=1)
+            threading.Thread(target=_generate_task_into, args=(results, query), daemon=True).start()
+            go_button.configure(state=tk.DISABLED)
+            status.config(text="Asking the LLM planner...")
+            prompt.after(100, poll_llm, results)
             return
 
-        prompt.destroy()
-        launch_overlay(tasks[task_key])
+        start_from_library()
 
     go_button = tk.Button(prompt, text="Start Fullscreen Guidance", command=on_start, font=("Segoe UI", 12, "bold"))
     go_button.pack(pady=8)
 
     entry.focus_set()
-    entry.bind("<KeyRelease>", lambda _: refresh_suggestions())
+    entry.bind("<KeyRelease>", schedule_refresh)
     prompt.bind("<Return>", lambda _: on_start())
     listbox.bind("<Double-Button-1>", lambda _: on_start())
 
@@ -1,13 +1,26 @@
+import io
 import json
+import os
+import queue
 import tempfile
+import threading
 import unittest
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from unittest import mock
 
 from overlay_assistant import (
     Action,
     FrontendAgent,
     Step,
     _extract_json_blob,
+    _generate_task_into,
+    _plan_cache,
+    _post_chat_completion,
+    _read_message_content,
+    build_task_index,
+    generate_task_from_llm,
     infer_task_key,
     load_task_library,
     suggest_tasks,
@@ -15,11 +28,32 @@ from overlay_assistant import (
 
 
 class OverlayAssistantTests(unittest.TestCase):
+    def setUp(self):
+        _plan_cache.clear()
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir = Path(cache_dir.name)
+        cache_dir_patch = mock.patch("overlay_assistant._task_cache_dir", return_value=self.cache_dir)
+        cache_dir_patch.start()
+        self.addCleanup(cache_dir_patch.stop)
+
     def test_infer_task_key_scores_multiple_keywords(self):
         self.assertEqual(infer_task_key("my internet wifi is down"), "wifi")
         self.assertEqual(infer_task_key("need vpn secure access"), "vpn")
         self.assertIsNone(infer_task_key(""))
 
+    def test_infer_task_key_accepts_custom_keywords(self):
+        keywords = {"printer": ("printer", "print"), "mail": ("outlook", "email", "mail")}
+        self.assertEqual(infer_task_key("my outlook email is stuck", keywords), "mail")
+        self.assertEqual(infer_task_key("printer will not print", keywords), "printer")
+        self.assertIsNone(infer_task_key("connect to wifi", keywords))
+
+    def test_infer_task_key_matches_whole_words_and_phrases(self):
+        self.assertEqual(infer_task_key("my wi-fi dropped"), "wifi")
+        self.assertEqual(infer_task_key("vpn-client broken"), "vpn")
+        self.assertEqual(infer_task_key("Secure Access keeps failing"), "vpn")
+        self.assertIsNone(infer_task_key("vpnclient crashed"))
+
     def test_load_task_library_merges_tasks_file(self):
         payload = {
             "bluetooth": {
@@ -39,21 +73,240 @@ class OverlayAssistantTests(unittest.TestCase):
         self.assertEqual(tasks["bluetooth"].title, "Connect Bluetooth Device")
         self.assertEqual(tasks["bluetooth"].steps[0].actions[0].type, "open_app")
 
+    def test_load_task_library_reuses_cache_until_file_changes(self):
+        payload = {"printer": {"title": "Add Printer", "description": "Add a printer", "steps": [{"instruction": "Open settings"}]}}
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tasks_file = Path(tmpdir) / "tasks.json"
+            tasks_file.write_text(json.dumps(payload), encoding="utf-8")
+
+            first = load_task_library(str(tasks_file))
+            self.assertEqual(len(list(self.cache_dir.glob("tasks-*.pkl"))), 1)
+            self.assertEqual(list(Path(tmpdir).iterdir()), [tasks_file])
+            with mock.patch("overlay_assistant._build_task") as build:
+                cached = load_task_library(str(tasks_file))
+            build.assert_not_called()
+            self.assertEqual(cached["printer"], first["printer"])
+
+            payload["printer"]["title"] = "Add Network Printer"
+            tasks_file.write_text(json.dumps(payload), encoding="utf-8")
+            os.utime(tasks_file, ns=(0, 0))
+            self.assertEqual(load_task_library(str(tasks_file))["printer"].title, "Add Network Printer")
+
+    def test_load_task_library_ignores_cache_next_to_tasks_file(self):
+        payload = {"printer": {"title": "Add Printer", "description": "Add a printer", "steps": [{"instruction": "Open settings"}]}}
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tasks_file = Path(tmpdir) / "tasks.json"
+            tasks_file.write_text(json.dumps(payload), encoding="utf-8")
+            (Path(tmpdir) / "tasks.cache.pkl").write_bytes(b"not a pickle")
+
+            with mock.patch("pickle.load", side_effect=AssertionError("sibling cache was read")) as load:
+                tasks = load_task_library(str(tasks_file))
+
+        load.assert_not_called()
+        self.assertEqual(tasks["printer"].title, "Add Printer")
+
     def test_suggest_tasks_returns_ranked_matches(self):
         tasks = load_task_library("does-not-exist.json")
         suggestions = suggest_tasks("please connect vpn", tasks)
         self.assertEqual(suggestions[0], "vpn")
 
+    def test_suggest_tasks_ignores_punctuation(self):
+        tasks = load_task_library("does-not-exist.json")
+        self.assertEqual(suggest_tasks("wireless?", tasks)[0], "wifi")
+
+    def test_suggest_tasks_limits_to_k(self):
+        tasks = load_task_library("does-not-exist.json")
+        self.assertEqual(suggest_tasks("connect", tasks, k=1), ["wifi"])
+        self.assertEqual(suggest_tasks("", tasks, k=1), ["wifi"])
+
+    def test_suggest_tasks_with_prebuilt_index_on_large_library(self):
+        payload = {
+            f"task{i}": {"title": f"Task {i}", "description": f"topic{i % 50} shared", "steps": [{"instruction": "x"}]}
+            for i in range(2000)
+        }
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tasks_file = Path(tmpdir) / "tasks.json"
+            tasks_file.write_text(json.dumps(payload), encoding="utf-8")
+            tasks = load_task_library(str(tasks_file))
+
+        index = build_task_index(tasks)
+        self.assertEqual(suggest_tasks("task7 topic7", tasks, k=3, index=index), ["task7", "task57", "task107"])
+        self.assertEqual(suggest_tasks("task7 topic7", tasks, k=3, index=index), suggest_tasks("task7 topic7", tasks, k=3))
+
+    def test_suggest_tasks_ignores_stale_index(self):
+        tasks = load_task_library("does-not-exist.json")
+        index = build_task_index(tasks)
+        del tasks["vpn"]
+        self.assertEqual(suggest_tasks("vpn connect", tasks, index=index), ["wifi"])
+
     def test_extract_json_blob_supports_fenced_json(self):
         blob = _extract_json_blob("```json\n{\"title\":\"x\",\"description\":\"y\",\"steps\":[]}\n```")
         self.assertIsNotNone(blob)
         self.assertEqual(blob["title"], "x")
 
+    def test_extract_json_blob_supports_bare_fence(self):
+        blob = _extract_json_blob("```\n{\"title\":\"x\"}\n```\n")
+        self.assertEqual(blob, {"title": "x"})
+        self.assertIsNone(_extract_json_blob("```json\nnot json\n```"))
+
+    def test_read_message_content_extracts_first_choice(self):
+        body = {"id": "x", "choices": [{"message": {"role": "assistant", "content": "{}"}}, {"message": {"content": "no"}}]}
+        self.assertEqual(_read_message_content(io.BytesIO(json.dumps(body).encode("utf-8"))), "{}")
+
+    def test_post_chat_completion_reuses_connection(self):
+        connections = []
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                connections.append(self.client_address)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                body = json.dumps({"choices": [{"message": {"content": "ok"}}]}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        endpoint = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+        no_proxy = mock.patch("urllib.request.getproxies", return_value={})
+        no_proxy.start()
+        self.addCleanup(no_proxy.stop)
+        self.assertEqual(_post_chat_completion(endpoint, {"model": "m"}, ""), "ok")
+        self.assertEqual(_post_chat_completion(endpoint, {"model": "m"}, ""), "ok")
+        self.assertEqual(len(connections), 1)
+
+    def test_post_chat_completion_rejects_redirect_without_resending(self):
+        requests = []
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                requests.append(("POST", self.path))
+                self.send_response(307)
+                self.send_header("Location", "/v1/chat/completions")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        endpoint = f"http://127.0.0.1:{server.server_port}/moved"
+        with mock.patch("urllib.request.getproxies", return_value={}):
+            with self.assertRaises(urllib.error.HTTPError) as ctx:
+                _post_chat_completion(endpoint, {"model": "m"}, "")
+
+        self.assertEqual(ctx.exception.code, 307)
+        self.assertEqual(requests, [("POST", "/moved")])
+
+    def test_post_chat_completion_uses_urlopen_when_proxy_applies(self):
+        body = json.dumps({"choices": [{"message": {"content": "ok"}}]}).encode("utf-8")
+        with mock.patch("urllib.request.getproxies", return_value={"https": "http://proxy.internal:3128"}), mock.patch(
+            "urllib.request.proxy_bypass", return_value=False
+        ), mock.patch("urllib.request.urlopen", return_value=io.BytesIO(body)) as urlopen, mock.patch(
+            "overlay_assistant._acquire_connection"
+        ) as acquire:
+            content = _post_chat_completion("https://llm.internal/v1/chat/completions", {"model": "m"}, "secret")
+
+        self.assertEqual(content, "ok")
+        acquire.assert_not_called()
+        request = urlopen.call_args.args[0]
+        self.assertEqual(request.full_url, "https://llm.internal/v1/chat/completions")
+        self.assertEqual(request.get_header("Authorization"), "Bearer secret")
+
+    def test_generate_task_from_llm_builds_task_from_response(self):
+        plan = {"title": "x", "description": "y", "steps": [{"instruction": "Open settings"}]}
+        env = {"OVERLAY_LLM_URL": "http://llm.invalid/v1/chat/completions", "OVERLAY_LLM_MODEL": "m"}
+        with mock.patch.dict(os.environ, env), mock.patch("overlay_assistant._post_chat_completion", return_value=json.dumps(plan)):
+            task = generate_task_from_llm("open settings")
+
+        self.assertIsNotNone(task)
+        self.assertEqual(task.source, "llm")
+        self.assertEqual(task.steps[0].instruction, "Open settings")
+
+    def test_generate_task_from_llm_picks_first_valid_candidate(self):
+        plan = {"title": "x", "description": "y", "steps": [{"instruction": "Open settings"}]}
+        responses = ["not json", json.dumps(plan)]
+        env = {
+            "OVERLAY_LLM_URL": "http://llm.invalid/v1/chat/completions",
+            "OVERLAY_LLM_MODEL": "m",
+            "OVERLAY_LLM_CANDIDATES": "2",
+        }
+        with mock.patch.dict(os.environ, env), mock.patch("overlay_assistant._post_chat_completion", side_effect=responses) as post:
+            task = generate_task_from_llm("open settings")
+
+        self.assertEqual(post.call_count, 2)
+        self.assertIsNotNone(task)
+        self.assertEqual(task.title, "x")
+
+    def test_generate_task_from_llm_caches_successful_plans_only(self):
+        plan = {"title": "x", "description": "y", "steps": [{"instruction": "Open settings"}]}
+        env = {"OVERLAY_LLM_URL": "http://llm.invalid/v1/chat/completions", "OVERLAY_LLM_MODEL": "m"}
+        with mock.patch.dict(os.environ, env), mock.patch(
+            "overlay_assistant._post_chat_completion", side_effect=["not json", json.dumps(plan)]
+        ) as post:
+            self.assertIsNone(generate_task_from_llm("open settings"))
+            self.assertIsNotNone(generate_task_from_llm("open settings"))
+            self.assertIsNotNone(generate_task_from_llm("open settings"))
+
+        self.assertEqual(post.call_count, 2)
+
+    def test_generate_task_from_llm_evicts_least_recent_plan(self):
+        plan = json.dumps({"title": "x", "description": "y", "steps": [{"instruction": "Open settings"}]})
+        env = {"OVERLAY_LLM_URL": "http://llm.invalid/v1/chat/completions", "OVERLAY_LLM_MODEL": "m"}
+        with mock.patch.dict(os.environ, env), mock.patch("overlay_assistant.PLAN_CACHE_SIZE", 1), mock.patch(
+            "overlay_assistant._post_chat_completion", return_value=plan
+        ) as post:
+            generate_task_from_llm("open settings")
+            generate_task_from_llm("connect vpn")
+            generate_task_from_llm("open settings")
+
+        self.assertEqual(post.call_count, 3)
+        self.assertEqual(len(_plan_cache), 1)
+
+    def test_generate_task_into_posts_none_when_planner_raises(self):
+        results = queue.Queue(maxsize=1)
+        with mock.patch("overlay_assistant.generate_task_from_llm", side_effect=RuntimeError("boom")):
+            _generate_task_into(results, "open settings")
+
+        self.assertIsNone(results.get_nowait())
+
+    def test_generate_task_from_llm_requires_endpoint(self):
+        with mock.patch.dict(os.environ, {"OVERLAY_LLM_URL": "", "OVERLAY_LLM_MODEL": ""}):
+            self.assertIsNone(generate_task_from_llm("open settings"))
+
     def test_agent_handles_unknown_action(self):
         agent = FrontendAgent()
         logs = agent.execute_step(Step(instruction="x", actions=[Action(type="unknown")]))
         self.assertIn("Unknown action type", logs[0])
 
+    def test_agent_sends_hotkey_through_cached_pyautogui(self):
+        fake_pyautogui = mock.Mock()
+        with mock.patch.object(FrontendAgent, "_pyautogui", fake_pyautogui), mock.patch.object(FrontendAgent, "_pyautogui_tried", True):
+            logs = FrontendAgent().execute_step(Step(instruction="x", actions=[Action(type="hotkey", value="ctrl+shift+s")]))
+
+        fake_pyautogui.hotkey.assert_called_once_with("ctrl", "shift", "s")
+        self.assertEqual(logs, ["Sent hotkey: ctrl+shift+s"])
+
 
 if __name__ == "__main__":
     unittest.main()